@@ -3,26 +3,38 @@ FAForever Wiki - Main Application
 A futuristic wiki for FAForever with editor functionality
 """
 
+import functools
 import os
+import time
 from datetime import datetime, timedelta
-from flask import Flask, Blueprint, render_template, request, redirect, url_for, jsonify, flash
+from flask import Flask, Blueprint, render_template, request, redirect, url_for, jsonify, flash, g, session
+from flask_caching import Cache
 from flask_login import current_user, login_required
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import load_only, selectinload
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from config import get_config, BASE_PATH
-from models import db, init_db, User, Page, ContentBlock, Button, Team, TeamMember, ReplayReview, RadarChart, EditorPermission
+from config import get_config, BASE_PATH, DATABASE_PATH, JINJA_CACHE_DIR
+from models import db, init_db, upgrade_db, User, Page, ContentBlock, Button, Team, TeamMember, ReplayReview, EditorPermission
 from auth import auth_bp, init_auth, can_edit, editor_mode_active
 
 # Create Flask app
 app = Flask(__name__)
 app.config.from_object(get_config())
 
+# Persist compiled templates so new workers skip parsing
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(str(JINJA_CACHE_DIR))
+
 # Proxy fix for reverse proxy support
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 
 # Initialize extensions
 db.init_app(app)
 init_auth(app)
+cache = Cache(app)
 
 # Register auth blueprint
 app.register_blueprint(auth_bp, url_prefix=f'{BASE_PATH}')
@@ -38,11 +50,43 @@ api_bp = Blueprint('api', __name__, url_prefix='/api')
 # Context Processors
 # =============================================================================
 
+def _get_nav_teams():
+    """Sidebar teams, queried at most once per request"""
+    if 'nav_teams' not in g:
+        g.nav_teams = (Team.query
+                       .options(load_only(Team.slug, Team.name))
+                       .order_by(Team.position)
+                       .limit(5)
+                       .all())
+    return g.nav_teams
+
+
+class _LazyNavTeams:
+    """Defers the sidebar teams query until a template actually iterates it"""
+
+    def __iter__(self):
+        return iter(_get_nav_teams())
+
+
+_nav_teams = _LazyNavTeams()
+
+
+def home_url():
+    """URL of the dashboard, built once per request for breadcrumbs"""
+    if '_home_url' not in g:
+        g._home_url = url_for('main.home')
+    return g._home_url
+
+
+@functools.lru_cache(maxsize=1)
+def _current_year(hour_bucket):
+    """Current year, recomputed only when the hour bucket changes"""
+    return datetime.now().year
+
+
 @app.context_processor
 def inject_globals():
     """Inject global variables into templates"""
-    teams = Team.query.order_by(Team.position).limit(5).all()
-
     # Extract current page slug from request
     current_slug = None
     if request.endpoint == 'main.page':
@@ -55,8 +99,8 @@ def inject_globals():
     return {
         'editor_mode': editor_mode_active(),
         'base_path': BASE_PATH,
-        'current_year': datetime.now().year,
-        'teams_nav': teams,
+        'current_year': _current_year(int(time.time()) // 3600),
+        'teams_nav': _nav_teams,
         'current_slug': current_slug
     }
 
@@ -65,70 +109,100 @@ def inject_globals():
 # Main Routes
 # =============================================================================
 
+def _skip_page_cache():
+    """Logged-in users and pending flash messages always get a fresh render"""
+    return current_user.is_authenticated or '_flashes' in session
+
+
+# Dashboard counters only need to be roughly current
+HOME_STATS_TTL = 30
+_home_stats_cache = {'stats': None, 'expires': 0.0}
+
+
+def _home_stats():
+    """Page/team/review counts in one round-trip, cached for HOME_STATS_TTL seconds"""
+    now = time.monotonic()
+    if _home_stats_cache['stats'] is None or now >= _home_stats_cache['expires']:
+        pages, teams, reviews = db.session.execute(select(
+            select(func.count(Page.id)).scalar_subquery(),
+            select(func.count(Team.id)).scalar_subquery(),
+            select(func.count(ReplayReview.id)).scalar_subquery(),
+        )).one()
+        _home_stats_cache['stats'] = {
+            'pages': pages or 45,
+            'teams': teams or 11,
+            'reviews': reviews or 23
+        }
+        _home_stats_cache['expires'] = now + HOME_STATS_TTL
+    return _home_stats_cache['stats']
+
+
+def _invalidate_home_stats():
+    """Call after committing rows into pages, teams or replay_reviews"""
+    _home_stats_cache['stats'] = None
+
+
+# News items (hardcoded for demo)
+_NEWS_ITEMS = (
+    {
+        'category': 'patch',
+        'title': 'Balance Patch 3812 Released',
+        'excerpt': 'Major balance changes to T3 air units and experimental weapons. Cybran Loyalist now has improved splash damage, and Aeon Restorer cost reduced by 15%.',
+        'date': 'Jan 15, 2026',
+        'author': 'Balance Team'
+    },
+    {
+        'category': 'event',
+        'title': 'Winter Championship 2026 Announced',
+        'excerpt': 'Registration is now open for the Winter Championship. $5000 prize pool with matches starting February 1st. Sign up on the forums!',
+        'date': 'Jan 12, 2026',
+        'author': 'Tournament Team'
+    },
+    {
+        'category': 'announcement',
+        'title': 'New Matchmaker Rating System',
+        'excerpt': 'We are rolling out Trueskill2 for all ladder queues. Your rating will be recalculated over the next few games for better match quality.',
+        'date': 'Jan 10, 2026',
+        'author': 'Matchmaking Team'
+    },
+    {
+        'category': 'update',
+        'title': 'FAF Client v2024.1.0 Available',
+        'excerpt': 'New client version with improved map preview, faster downloads, and a redesigned chat interface. Update now for the best experience.',
+        'date': 'Jan 8, 2026',
+        'author': 'DevOps Team'
+    },
+)
+
+# Activities (hardcoded for demo)
+_ACTIVITIES = (
+    {'type': 'edit', 'text': '<strong>Brutus5000</strong> updated "Economy Guide"', 'time': '2 hours ago'},
+    {'type': 'add', 'text': '<strong>Trainer Team</strong> added new replay review', 'time': '5 hours ago'},
+    {'type': 'user', 'text': '<strong>Sheikah</strong> joined the Balance Team', 'time': '1 day ago'},
+    {'type': 'edit', 'text': '<strong>Askaholic</strong> updated "API Documentation"', 'time': '2 days ago'},
+    {'type': 'add', 'text': '<strong>Penguin</strong> added "Seraphim T2 Guide"', 'time': '3 days ago'},
+)
+
+
 @main_bp.route('/')
 def home():
     """Dashboard homepage with news, stats, activity"""
-    # Stats
-    stats = {
-        'pages': Page.query.count() or 45,
-        'teams': Team.query.count() or 11,
-        'reviews': ReplayReview.query.count() or 23
-    }
-
-    # News items (hardcoded for demo)
-    news_items = [
-        {
-            'category': 'patch',
-            'title': 'Balance Patch 3812 Released',
-            'excerpt': 'Major balance changes to T3 air units and experimental weapons. Cybran Loyalist now has improved splash damage, and Aeon Restorer cost reduced by 15%.',
-            'date': 'Jan 15, 2026',
-            'author': 'Balance Team'
-        },
-        {
-            'category': 'event',
-            'title': 'Winter Championship 2026 Announced',
-            'excerpt': 'Registration is now open for the Winter Championship. $5000 prize pool with matches starting February 1st. Sign up on the forums!',
-            'date': 'Jan 12, 2026',
-            'author': 'Tournament Team'
-        },
-        {
-            'category': 'announcement',
-            'title': 'New Matchmaker Rating System',
-            'excerpt': 'We are rolling out Trueskill2 for all ladder queues. Your rating will be recalculated over the next few games for better match quality.',
-            'date': 'Jan 10, 2026',
-            'author': 'Matchmaking Team'
-        },
-        {
-            'category': 'update',
-            'title': 'FAF Client v2024.1.0 Available',
-            'excerpt': 'New client version with improved map preview, faster downloads, and a redesigned chat interface. Update now for the best experience.',
-            'date': 'Jan 8, 2026',
-            'author': 'DevOps Team'
-        }
-    ]
-
-    # Activities (hardcoded for demo)
-    activities = [
-        {'type': 'edit', 'text': '<strong>Brutus5000</strong> updated "Economy Guide"', 'time': '2 hours ago'},
-        {'type': 'add', 'text': '<strong>Trainer Team</strong> added new replay review', 'time': '5 hours ago'},
-        {'type': 'user', 'text': '<strong>Sheikah</strong> joined the Balance Team', 'time': '1 day ago'},
-        {'type': 'edit', 'text': '<strong>Askaholic</strong> updated "API Documentation"', 'time': '2 days ago'},
-        {'type': 'add', 'text': '<strong>Penguin</strong> added "Seraphim T2 Guide"', 'time': '3 days ago'}
-    ]
+    stats = _home_stats()
 
     return render_template('pages/home.html',
                          stats=stats,
-                         news_items=news_items,
-                         activities=activities,
+                         news_items=_NEWS_ITEMS,
+                         activities=_ACTIVITIES,
                          active_nav='home',
                          current_path='Dashboard')
 
 
 @main_bp.route('/getting-started')
+@cache.cached(unless=_skip_page_cache)
 def getting_started():
     """Getting Started page"""
     breadcrumbs = [
-        {'name': 'Home', 'url': url_for('main.home')},
+        {'name': 'Home', 'url': home_url()},
         {'name': 'Getting Started', 'url': None}
     ]
 
@@ -148,10 +222,11 @@ def getting_started():
 
 
 @main_bp.route('/playing')
+@cache.cached(unless=_skip_page_cache)
 def playing():
     """Playing page with game guides overview"""
     breadcrumbs = [
-        {'name': 'Home', 'url': url_for('main.home')},
+        {'name': 'Home', 'url': home_url()},
         {'name': 'Playing', 'url': None}
     ]
 
@@ -162,10 +237,11 @@ def playing():
 
 
 @main_bp.route('/rules')
+@cache.cached(unless=_skip_page_cache)
 def rules():
     """Rules overview page"""
     breadcrumbs = [
-        {'name': 'Home', 'url': url_for('main.home')},
+        {'name': 'Home', 'url': home_url()},
         {'name': 'Rules', 'url': None}
     ]
 
@@ -179,20 +255,19 @@ def rules():
 def rules_detail(slug):
     """Individual rules page with actual content"""
     breadcrumbs = [
-        {'name': 'Home', 'url': url_for('main.home')},
+        {'name': 'Home', 'url': home_url()},
         {'name': 'Rules', 'url': url_for('main.rules')},
-        {'name': slug.replace('-', ' ').title(), 'url': None}
+        {'name': slug_to_title(slug), 'url': None}
     ]
 
-    # Get or create the page with content
-    page = Page.query.filter_by(slug=f'rules/{slug}').first()
+    # Unsaved pages render from an in-memory stub; the editor endpoint creates the row
+    page = _find_page_row(f'rules/{slug}')
     if not page:
-        page = Page(slug=f'rules/{slug}', title=slug.replace('-', ' ').title())
-        db.session.add(page)
-        db.session.commit()
+        page = Page(slug=f'rules/{slug}', title=slug_to_title(slug))
 
-    content = page.get_content()
-    content_html = content.get('html', get_default_rules_content(slug))
+    content_html = page.content_html
+    if content_html is None:
+        content_html = get_default_rules_content(slug)
 
     return render_template('pages/rules_detail.html',
                          page=page,
@@ -206,7 +281,7 @@ def rules_detail(slug):
 def teams():
     """FAF Teams overview page"""
     breadcrumbs = [
-        {'name': 'Home', 'url': url_for('main.home')},
+        {'name': 'Home', 'url': home_url()},
         {'name': 'FAF Teams', 'url': None}
     ]
 
@@ -222,17 +297,17 @@ def teams():
 @main_bp.route('/teams/<slug>')
 def team_detail(slug):
     """Individual team page"""
-    team = Team.query.filter_by(slug=slug).first_or_404()
+    team = (Team.query
+            .options(selectinload(Team.members), selectinload(Team.radar_charts))
+            .filter_by(slug=slug)
+            .first_or_404())
 
     breadcrumbs = [
-        {'name': 'Home', 'url': url_for('main.home')},
+        {'name': 'Home', 'url': home_url()},
         {'name': 'FAF Teams', 'url': url_for('main.teams')},
         {'name': team.name, 'url': None}
     ]
 
-    members = TeamMember.query.filter_by(team_id=team.id).order_by(TeamMember.position).all()
-    radar_charts = RadarChart.query.filter_by(team_id=team.id).all()
-
     # Get replay reviews for trainer team
     reviews = []
     if slug == 'trainer':
@@ -240,8 +315,8 @@ def team_detail(slug):
 
     return render_template('pages/team_detail.html',
                          team=team,
-                         members=members,
-                         radar_charts=radar_charts,
+                         members=team.members,
+                         radar_charts=team.radar_charts,
                          reviews=reviews,
                          breadcrumbs=breadcrumbs,
                          active_nav='teams',
@@ -249,10 +324,11 @@ def team_detail(slug):
 
 
 @main_bp.route('/creation')
+@cache.cached(unless=_skip_page_cache)
 def creation():
     """Creation & Development page"""
     breadcrumbs = [
-        {'name': 'Home', 'url': url_for('main.home')},
+        {'name': 'Home', 'url': home_url()},
         {'name': 'Creation & Development', 'url': None}
     ]
 
@@ -262,27 +338,29 @@ def creation():
                          current_path='Creation & Development')
 
 
+# Generic page slugs grouped under a sidebar section
+_PLAYING_PAGES = frozenset({
+    'game-basics', 'matchmaking', 'tutorials', 'replays', 'eco-guide',
+    'micro-guide', 'faction-guide', 'build-orders', 'hotkeys', '1v1-guide',
+    'tmm-guide', 'custom-games', 'coop-campaign', 'faction-uef',
+    'faction-cybran', 'faction-aeon', 'faction-seraphim'
+})
+_CREATION_PAGES = frozenset({'mapping', 'modding', 'development', 'balance-contributions'})
+
+
 @main_bp.route('/page/<slug>')
 def page(slug):
     """Generic page route"""
-    page_obj = Page.query.filter_by(slug=slug).first()
+    page_obj = _find_page_row(slug)
     if not page_obj:
-        page_obj = Page(slug=slug, title=slug.replace('-', ' ').title())
-        db.session.add(page_obj)
-        db.session.commit()
+        page_obj = Page(slug=slug, title=slug_to_title(slug))
 
     # Determine active_nav based on slug category
-    playing_pages = ['game-basics', 'matchmaking', 'tutorials', 'replays', 'eco-guide',
-                     'micro-guide', 'faction-guide', 'build-orders', 'hotkeys', '1v1-guide',
-                     'tmm-guide', 'custom-games', 'coop-campaign', 'faction-uef',
-                     'faction-cybran', 'faction-aeon', 'faction-seraphim']
-    creation_pages = ['mapping', 'modding', 'development', 'balance-contributions']
-
-    if slug in playing_pages:
+    if slug in _PLAYING_PAGES:
         active_nav = 'playing'
         parent_name = 'Playing'
         parent_url = url_for('main.playing')
-    elif slug in creation_pages:
+    elif slug in _CREATION_PAGES:
         active_nav = 'creation'
         parent_name = 'Creation & Dev'
         parent_url = url_for('main.creation')
@@ -292,14 +370,15 @@ def page(slug):
         parent_url = None
 
     breadcrumbs = [
-        {'name': 'Home', 'url': url_for('main.home')}
+        {'name': 'Home', 'url': home_url()}
     ]
     if parent_name:
         breadcrumbs.append({'name': parent_name, 'url': parent_url})
     breadcrumbs.append({'name': page_obj.title, 'url': None})
 
-    content = page_obj.get_content()
-    content_html = content.get('html', get_default_page_content(slug))
+    content_html = page_obj.content_html
+    if content_html is None:
+        content_html = get_default_page_content(slug)
 
     return render_template('pages/generic.html',
                          page=page_obj,
@@ -316,10 +395,10 @@ def page(slug):
 @api_bp.route('/button/form')
 @login_required
 def button_form():
-    button_id = request.args.get('button_id')
+    button_id = request.args.get('button_id', type=int)
     section = request.args.get('section', '')
     page_slug = request.args.get('page', '')
-    button = Button.query.get(button_id) if button_id else None
+    button = db.session.get(Button, button_id) if button_id else None
     return render_template('partials/button_form.html', button=button, section=section, page_slug=page_slug)
 
 @api_bp.route('/button', methods=['POST'])
@@ -328,43 +407,48 @@ def create_button():
     data = request.form
     page_slug = data.get('page_slug', 'home')
     section_id = data.get('section_id', 'main-nav')
-    page = Page.query.filter_by(slug=page_slug).first()
-    if not page:
-        page = Page(slug=page_slug, title=page_slug.replace('-', ' ').title())
-        db.session.add(page)
-        db.session.flush()
-    content_block = ContentBlock.query.filter_by(page_id=page.id, section_id=section_id).first()
-    if not content_block:
-        content_block = ContentBlock(page_id=page.id, block_type='button_grid', section_id=section_id)
-        db.session.add(content_block)
-        db.session.flush()
-    max_pos = db.session.query(db.func.max(Button.position)).filter_by(content_block_id=content_block.id).scalar() or 0
-    button = Button(
-        content_block_id=content_block.id,
-        label=data.get('label', 'New Button'),
-        description=data.get('description', ''),
-        link_url=data.get('link_url', '#'),
-        link_type=data.get('link_type', 'internal'),
-        icon_url=data.get('icon_url', ''),
-        position=max_pos + 1
-    )
-    db.session.add(button)
+    page_id = _upsert_page_id(page_slug, slug_to_title(page_slug))
+    content_block_id = db.session.execute(
+        select(ContentBlock.id).where(ContentBlock.page_id == page_id, ContentBlock.section_id == section_id)
+    ).scalar()
+    if content_block_id is None:
+        content_block_id = db.session.execute(
+            insert(ContentBlock)
+            .values(page_id=page_id, block_type='button_grid', section_id=section_id)
+            .returning(ContentBlock.id)
+        ).scalar_one()
+    # Position is computed inside the INSERT so concurrent creates can't collide
+    next_position = func.coalesce(func.max(Button.position), 0) + 1
+    stmt = insert(Button).from_select(
+        ['content_block_id', 'label', 'description', 'link_url', 'link_type', 'icon_url', 'position'],
+        select(
+            literal(content_block_id),
+            literal(data.get('label', 'New Button')),
+            literal(data.get('description') or ''),
+            literal(data.get('link_url', '#')),
+            literal(data.get('link_type', 'internal')),
+            literal(data.get('icon_url') or ''),
+            next_position
+        ).where(Button.content_block_id == content_block_id)
+    ).returning(Button.id)
+    button_id = db.session.execute(stmt).scalar_one()
     db.session.commit()
-    return jsonify({'success': True, 'id': button.id})
+    _invalidate_home_stats()
+    return jsonify({'success': True, 'id': button_id})
 
 @api_bp.route('/page/<slug>/content', methods=['PUT'])
 @login_required
 def update_page_content(slug):
     page = Page.query.filter_by(slug=slug).first()
     if not page:
-        page = Page(slug=slug, title=slug.replace('-', ' ').title())
+        page = Page(slug=slug, title=slug_to_title(slug))
         db.session.add(page)
     data = request.get_json()
     content = page.get_content()
     content['html'] = data.get('content', '')
     page.set_content(content)
-    page.updated_at = datetime.utcnow()
     db.session.commit()
+    _invalidate_home_stats()
     return jsonify({'success': True})
 
 
@@ -381,48 +465,46 @@ def reviews():
 
     reviews = query.order_by(ReplayReview.published_at.desc()).limit(10).all()
 
-    html = ''
-    for review in reviews:
-        html += f'''
-        <div class="review-card">
-            <div class="review-header">
-                <span class="review-gamemode">{review.gamemode}</span>
-                <span class="review-map">{review.map_name}</span>
-            </div>
-            <h4 class="review-title">{review.title}</h4>
-            <div class="review-content">{review.content_html[:200]}...</div>
-            <div class="review-meta">
-                <span>by {review.author}</span>
-                <span>{review.published_at.strftime('%Y-%m-%d')}</span>
-            </div>
-        </div>
-        '''
-
-    if not html:
-        html = '<p class="text-muted">No replay reviews found.</p>'
-
-    return html
+    return render_template('partials/review_cards.html', reviews=reviews)
 
 
 # =============================================================================
 # Helper Functions
 # =============================================================================
 
+@functools.lru_cache(maxsize=1024)
+def slug_to_title(slug):
+    """Display title for a slug, e.g. 'vault-rules' -> 'Vault Rules'"""
+    return slug.replace('-', ' ').title()
+
+def _find_page_row(slug):
+    """Read-only lookup of the page columns the content templates render"""
+    return db.session.execute(
+        select(Page.slug, Page.title, Page.content_html).where(Page.slug == slug)
+    ).first()
+
+def _upsert_page_id(slug, title):
+    """Id of the page with this slug, inserting it first if missing (one statement)"""
+    stmt = sqlite_insert(Page).values(slug=slug, title=title)
+    # No-op update on conflict so RETURNING also yields the existing row's id
+    stmt = stmt.on_conflict_do_update(index_elements=[Page.slug], set_={'slug': stmt.excluded.slug})
+    return db.session.execute(stmt.returning(Page.id)).scalar_one()
+
 def get_page_buttons(page_slug, section_id):
-    page = Page.query.filter_by(slug=page_slug).first()
-    if not page:
-        return []
-    content_block = ContentBlock.query.filter_by(page_id=page.id, section_id=section_id).first()
-    if not content_block:
-        return []
-    return Button.query.filter_by(content_block_id=content_block.id).order_by(Button.position).all()
+    # Only the matching block's buttons are loaded: one query for the block, one for its buttons
+    content_block = (ContentBlock.query
+                     .join(ContentBlock.page)
+                     .options(load_only(ContentBlock.id), selectinload(ContentBlock.buttons))
+                     .filter(Page.slug == page_slug, ContentBlock.section_id == section_id)
+                     .order_by(ContentBlock.position)
+                     .first())
+    return content_block.buttons if content_block else []
 
 def get_page_faqs(page_slug):
     return []
 
-def get_default_rules_content(slug):
-    rules_content = {
-        'general-rules': '''
+_RULES_CONTENT = {
+    'general-rules': '''
 <h2>General Community Rules</h2>
 <p>Welcome to FAForever! To ensure everyone has a great experience, please follow these rules:</p>
 
@@ -462,7 +544,7 @@ def get_default_rules_content(slug):
 <h3>Enforcement</h3>
 <p>Violations may result in warnings, temporary bans, or permanent bans depending on severity. Appeals can be made on the forums or via Discord moderation channel.</p>
 ''',
-        'vault-rules': '''
+    'vault-rules': '''
 <h2>Map & Mod Vault Rules</h2>
 <p>The vault allows community members to share maps and mods. To keep it useful for everyone, follow these guidelines:</p>
 
@@ -498,7 +580,7 @@ def get_default_rules_content(slug):
     <li>Duplicate uploads of existing content</li>
 </ul>
 ''',
-        'chat-rules': '''
+    'chat-rules': '''
 <h2>Chat & Communication Rules</h2>
 <p>FAF provides multiple ways to communicate. Please follow these rules across all platforms:</p>
 
@@ -534,12 +616,10 @@ def get_default_rules_content(slug):
     <li>Don't bump old threads without good reason</li>
 </ul>
 '''
-    }
-    return rules_content.get(slug, '<p>Content coming soon...</p>')
+}
 
-def get_default_page_content(slug):
-    page_content = {
-        'game-basics': '''
+_PAGE_CONTENT = {
+    'game-basics': '''
 <h2>Game Basics</h2>
 <p>Supreme Commander: Forged Alliance is a real-time strategy game focused on large-scale warfare. Here are the fundamentals:</p>
 
@@ -568,7 +648,7 @@ def get_default_page_content(slug):
     <li>Capture enemy buildings</li>
 </ul>
 ''',
-        'matchmaking': '''
+    'matchmaking': '''
 <h2>Matchmaking System</h2>
 <p>FAF uses a sophisticated matchmaking system to create balanced games:</p>
 
@@ -595,7 +675,7 @@ def get_default_page_content(slug):
     <li>When matched, map is randomly selected from the pool</li>
 </ol>
 ''',
-        'tutorials': '''
+    'tutorials': '''
 <h2>Tutorials & Learning Resources</h2>
 
 <h3>Video Tutorials</h3>
@@ -614,7 +694,7 @@ def get_default_page_content(slug):
     <li><strong>Trainer Sessions:</strong> Request a session from the Trainer Team</li>
 </ol>
 ''',
-        'mapping': '''
+    'mapping': '''
 <h2>Map Creation Guide</h2>
 <p>Creating maps for FAF is a rewarding way to contribute to the community!</p>
 
@@ -634,7 +714,7 @@ def get_default_page_content(slug):
     <li>Get feedback from experienced mappers</li>
 </ul>
 ''',
-        'development': '''
+    'development': '''
 <h2>Contributing to FAF Development</h2>
 <p>FAF is open source and welcomes contributors!</p>
 
@@ -656,8 +736,13 @@ def get_default_page_content(slug):
 
 <p>Visit <a href="https://github.com/FAForever">github.com/FAForever</a> to explore our repositories.</p>
 '''
-    }
-    return page_content.get(slug, '<p>This page is under construction. Content coming soon!</p>')
+}
+
+def get_default_rules_content(slug):
+    return _RULES_CONTENT.get(slug, '<p>Content coming soon...</p>')
+
+def get_default_page_content(slug):
+    return _PAGE_CONTENT.get(slug, '<p>This page is under construction. Content coming soon!</p>')
 
 
 # =============================================================================
@@ -674,25 +759,32 @@ app.register_blueprint(api_bp, url_prefix=f'{BASE_PATH}/api')
 
 def seed_comprehensive_data():
     """Seed the database with comprehensive example data"""
+    if not app.config['SEED_DEMO_DATA']:
+        return
+
     with app.app_context():
         # Skip if already seeded
-        if Team.query.count() > 0:
+        if db.session.execute(select(1).select_from(Team).limit(1)).scalar():
             return
 
-        # Demo users (example.com is a reserved domain for testing)
-        admin = User(username='admin', email='admin@example.com')
-        admin.set_password('admin123')
-        db.session.add(admin)
-
-        editor_teams = User(username='editor_teams', email='editor@example.com')
-        editor_teams.set_password('editor123')
-        db.session.add(editor_teams)
-
-        db.session.flush()
+        # Demo users (example.com is a reserved domain for testing). Their passwords
+        # are public, so a single hash iteration keeps seeding instant.
+        user_rows = db.session.execute(insert(User).returning(User.username, User.id), [
+            {'username': 'admin', 'email': 'admin@example.com',
+             **User.hash_password('admin123', iterations=1)},
+            {'username': 'editor_teams', 'email': 'editor@example.com',
+             **User.hash_password('editor123', iterations=1)},
+            {'username': 'editor_rules', 'email': 'rules@example.com',
+             **User.hash_password('editor123', iterations=1)},
+        ])
+        user_ids = dict(user_rows.all())
 
         # Permissions
-        db.session.add(EditorPermission(user_id=admin.id, page_slug='*', can_edit=True))
-        db.session.add(EditorPermission(user_id=editor_teams.id, page_slug='teams/*', can_edit=True))
+        db.session.execute(insert(EditorPermission), [
+            {'user_id': user_ids['admin'], 'page_slug': '*', 'can_edit': True},
+            {'user_id': user_ids['editor_teams'], 'page_slug': 'teams/*', 'can_edit': True},
+            {'user_id': user_ids['editor_rules'], 'page_slug': 'rules/*', 'can_edit': True},
+        ])
 
         # Teams with detailed descriptions
         teams_data = [
@@ -709,14 +801,13 @@ def seed_comprehensive_data():
             ('Campaign Team', 'campaign', 'Develops and maintains the co-op campaign missions and single-player content.'),
         ]
 
-        for i, (name, slug, desc) in enumerate(teams_data):
-            team = Team(name=name, slug=slug, description=desc, position=i)
-            db.session.add(team)
-
-        db.session.flush()
+        team_rows = db.session.execute(insert(Team).returning(Team.slug, Team.id), [
+            {'name': name, 'slug': slug, 'description': desc, 'position': i}
+            for i, (name, slug, desc) in enumerate(teams_data)
+        ])
+        team_ids = dict(team_rows.all())
 
         # Team members for Trainer Team
-        trainer_team = Team.query.filter_by(slug='trainer').first()
         trainers = [
             ('Morax', 'Head Trainer', 'Specializes in economy and macro strategy'),
             ('Tagada', 'Senior Trainer', 'Expert in aggressive play and timing attacks'),
@@ -724,9 +815,10 @@ def seed_comprehensive_data():
             ('Blodir', 'Trainer', 'Naval specialist and map awareness'),
             ('Farms', 'Trainer', 'ACU play and early game optimization'),
         ]
-        for i, (name, role, desc) in enumerate(trainers):
-            member = TeamMember(team_id=trainer_team.id, name=name, role=role, description=desc, position=i)
-            db.session.add(member)
+        db.session.execute(insert(TeamMember), [
+            {'team_id': team_ids['trainer'], 'name': name, 'role': role, 'description': desc, 'position': i}
+            for i, (name, role, desc) in enumerate(trainers)
+        ])
 
         # Replay reviews
         reviews_data = [
@@ -756,24 +848,55 @@ def seed_comprehensive_data():
 </ul>
 '''),
         ]
-        for title, gamemode, map_name, author, content in reviews_data:
-            review = ReplayReview(
-                title=title,
-                content_html=content,
-                gamemode=gamemode,
-                map_name=map_name,
-                author=author,
-                published_at=datetime.utcnow() - timedelta(days=len(reviews_data))
-            )
-            db.session.add(review)
+        published_at = datetime.utcnow() - timedelta(days=len(reviews_data))
+        db.session.execute(insert(ReplayReview), [
+            {
+                'title': title,
+                'content_html': content,
+                'gamemode': gamemode,
+                'map_name': map_name,
+                'author': author,
+                'published_at': published_at
+            }
+            for title, gamemode, map_name, author, content in reviews_data
+        ])
 
         # Create some pages
         pages_to_create = ['home', 'getting-started', 'rules', 'rules/general-rules', 'rules/vault-rules', 'rules/chat-rules']
-        for slug in pages_to_create:
-            page = Page(slug=slug, title=slug.split('/')[-1].replace('-', ' ').title())
-            db.session.add(page)
+        page_rows = db.session.execute(insert(Page).returning(Page.slug, Page.id), [
+            {'slug': slug, 'title': slug_to_title(slug.split('/')[-1])}
+            for slug in pages_to_create
+        ])
+        page_ids = dict(page_rows.all())
+
+        # Main navigation buttons on the home page
+        main_buttons_id = db.session.execute(
+            insert(ContentBlock)
+            .values(page_id=page_ids['home'], block_type='button_grid', position=0, section_id='main-nav')
+            .returning(ContentBlock.id)
+        ).scalar_one()
+
+        nav_items = [
+            ('Getting Started', 'Start your FAF journey', '/getting-started', 'rocket'),
+            ('Playing', 'Learn to play', '/playing', 'gamepad'),
+            ('Rules', 'Community guidelines', '/rules', 'book'),
+            ('FAF Teams', 'Meet the teams', '/teams', 'users'),
+        ]
+        db.session.execute(insert(Button), [
+            {
+                'content_block_id': main_buttons_id,
+                'label': label,
+                'description': desc,
+                'link_url': url,
+                'link_type': 'internal',
+                'icon_url': f'/static/assets/icons/{icon}.svg',
+                'position': i
+            }
+            for i, (label, desc, url, icon) in enumerate(nav_items)
+        ])
 
         db.session.commit()
+        _invalidate_home_stats()
         print("Database seeded with comprehensive example data!")
 
 
@@ -781,12 +904,17 @@ def seed_comprehensive_data():
 # Main Entry Point
 # =============================================================================
 
-if __name__ == '__main__':
-    os.makedirs(os.path.dirname(app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')), exist_ok=True)
+def prepare_database():
+    """Build and seed a fresh database, or upgrade an existing one in place"""
+    if DATABASE_PATH.exists():
+        upgrade_db(app)
+        return
+    os.makedirs(DATABASE_PATH.parent, exist_ok=True)
+    init_db(app)
+    seed_comprehensive_data()
 
-    with app.app_context():
-        db.create_all()
-        seed_comprehensive_data()
+if __name__ == '__main__':
+    prepare_database()
 
     print(f"\n{'='*60}")
     print(f"  FAForever Wiki")
@@ -795,6 +923,7 @@ if __name__ == '__main__':
     print(f"\n  Demo credentials:")
     print(f"    Admin: admin / admin123")
     print(f"    Teams Editor: editor_teams / editor123")
+    print(f"    Rules Editor: editor_rules / editor123")
     print(f"\n  To enable editor mode: login and add ?edit=1 to URL")
     print(f"{'='*60}\n")
 
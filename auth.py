@@ -1,6 +1,12 @@
-from flask import Blueprint, request, redirect, url_for, render_template, flash, session
+import time
+from collections import OrderedDict
+
+from flask import Blueprint, request, redirect, url_for, render_template, flash, session, g
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from models import db, User
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from models import db, User, EditorPermission
 
 auth_bp = Blueprint('auth', __name__)
 login_manager = LoginManager()
@@ -12,9 +18,70 @@ def init_auth(app):
     login_manager.login_message = 'Please log in to access this page.'
     login_manager.login_message_category = 'info'
 
+# Session users are cached per process as plain column values and re-attached
+# without a query. Local writes invalidate immediately via the version counter;
+# the TTL bounds how long another worker's changes can go unnoticed.
+USER_CACHE_TTL = 60
+USER_CACHE_SIZE = 1024
+_user_cache = OrderedDict()  # user id -> entry, least recently used first
+_user_cache_version = 0
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+@event.listens_for(EditorPermission, 'after_insert')
+@event.listens_for(EditorPermission, 'after_update')
+@event.listens_for(EditorPermission, 'after_delete')
+def _bump_user_cache_version(*args):
+    global _user_cache_version
+    _user_cache_version += 1
+
+_USER_CACHE_TABLES = (User.__table__, EditorPermission.__table__)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_on_bulk_write(orm_execute_state):
+    """Bulk/Core DML (query.delete(), session.execute(update(User)) ...) skips the flush events"""
+    if orm_execute_state.is_select or getattr(orm_execute_state.statement, 'table', None) not in _USER_CACHE_TABLES:
+        return None
+    result = orm_execute_state.invoke_statement()
+    _bump_user_cache_version()
+    return result
+
+def _column_values(obj):
+    return {attr.key: getattr(obj, attr.key) for attr in obj.__mapper__.column_attrs}
+
+def _restore_user(user_values, permission_values):
+    """Rebuild a cached user with its permissions and attach it to the session, no SQL"""
+    permissions = [EditorPermission(**values) for values in permission_values]
+    for perm in permissions:
+        make_transient_to_detached(perm)
+    user = User(**user_values)
+    set_committed_value(user, 'permissions', permissions)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    cached = _user_cache.get(user_id)
+    if cached and cached[0] == _user_cache_version and cached[1] > time.monotonic():
+        _user_cache.move_to_end(user_id)
+        return _restore_user(cached[2], cached[3])
+
+    version = _user_cache_version
+    # Permissions come along so can_edit checks in templates don't query again
+    user = db.session.get(User, user_id, options=[selectinload(User.permissions)])
+    if user is not None:
+        _user_cache[user_id] = (
+            version,
+            time.monotonic() + USER_CACHE_TTL,
+            _column_values(user),
+            [_column_values(perm) for perm in user.permissions],
+        )
+        _user_cache.move_to_end(user_id)
+        while len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+    return user
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -31,6 +98,9 @@ def login():
         ).first()
 
         if user and user.check_password(password):
+            if db.session.is_modified(user):
+                # check_password upgraded a legacy werkzeug hash
+                db.session.commit()
             login_user(user, remember=True)
             next_page = request.args.get('next')
             return redirect(next_page if next_page else url_for('main.home'))
@@ -48,13 +118,16 @@ def logout():
 
 def can_edit(page_slug, section_id=None):
     """Check if current user can edit a page/section"""
-    if not current_user.is_authenticated:
+    # Read-only views never show edit controls, so skip the user/permission lookup
+    if not editor_mode_active():
         return False
     return current_user.has_permission(page_slug, section_id)
 
 def editor_mode_active():
-    """Check if editor mode is currently active"""
-    return (
-        current_user.is_authenticated and
-        request.args.get('edit') == '1'
-    )
+    """Check if editor mode is currently active (evaluated once per request)"""
+    if '_editor_mode' not in g:
+        g._editor_mode = (
+            request.args.get('edit') == '1' and
+            current_user.is_authenticated
+        )
+    return g._editor_mode
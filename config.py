@@ -10,24 +10,43 @@ BASE_DIR = Path(__file__).resolve().parent
 # Database
 DATABASE_PATH = BASE_DIR / 'var' / 'app-instance' / 'wiki.db'
 
+# PBKDF2-SHA256 iterations for new passwords, tuned for interactive logins
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PWHASH_ITERATIONS', 210000))
+
+# Compiled template cache, shared by all workers
+JINJA_CACHE_DIR = Path(os.environ.get('JINJA_CACHE_DIR', BASE_DIR / 'var' / 'jinja-cache'))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{DATABASE_PATH}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'connect_args': {'check_same_thread': False},
+        'pool_pre_ping': True
+    }
     APPLICATION_ROOT = BASE_PATH if BASE_PATH else '/'
 
+    # Rendered-page cache for the static overview pages
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
+    CACHE_DEFAULT_TIMEOUT = 60
+
     # Session settings
     SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', 'False').lower() == 'true'
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour
 
+    # Populate an empty database with demo users and content on startup
+    SEED_DEMO_DATA = False
+
 class DevelopmentConfig(Config):
     DEBUG = True
+    SEED_DEMO_DATA = True
 
 class ProductionConfig(Config):
     DEBUG = False
     SESSION_COOKIE_SECURE = True
+    TEMPLATES_AUTO_RELOAD = False
 
 def get_config():
     env = os.environ.get('FLASK_ENV', 'development')
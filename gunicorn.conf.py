@@ -0,0 +1,24 @@
+"""
+Gunicorn settings for production
+Run with: gunicorn app:app (the database is created or upgraded before workers start)
+"""
+
+import os
+import subprocess
+import sys
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Requests are mostly waiting on the database and template I/O, so cooperative
+# gevent workers serve many of them concurrently per process. The gevent worker
+# monkey-patches the standard library itself before loading the app.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+
+def on_starting(server):
+    # Separate interpreter so the master never imports the app (workers fork from it
+    # before gevent patches them) and holds no SQLite connections
+    subprocess.run([sys.executable, '-c', 'import app; app.prepare_database()'],
+                   cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
@@ -1,44 +1,163 @@
-from datetime import datetime
+import hashlib
+import hmac
+import secrets
+import sqlite3
+from functools import cached_property
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-import json
+from sqlalchemy import case, event, func, literal, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import object_session, validates
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.schema import CreateIndex, CreateTable
+from werkzeug.security import check_password_hash
+import orjson
+
+from config import PASSWORD_HASH_ITERATIONS
 
 db = SQLAlchemy()
 
+# WAL lets readers run alongside a writer; NORMAL syncs at checkpoints instead of every commit
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=134217728',
+    'PRAGMA foreign_keys=ON',
+)
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+# EditorPermission.pattern_type values
+PERM_EXACT = 0   # page_slug is a single page
+PERM_PREFIX = 1  # 'section/*': every page under prefix
+PERM_STAR = 2    # '*': every page
+
+def _slug_pattern(page_slug):
+    """(pattern_type, prefix) for a permission's page_slug"""
+    if page_slug == '*':
+        return PERM_STAR, None
+    if page_slug.endswith('/*'):
+        return PERM_PREFIX, page_slug[:-2]
+    return PERM_EXACT, None
+
+def _default_pattern_type(context):
+    return _slug_pattern(context.get_current_parameters()['page_slug'])[0]
+
+def _default_prefix(context):
+    return _slug_pattern(context.get_current_parameters()['page_slug'])[1]
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(256), nullable=False)
+    # PBKDF2-HMAC-SHA256, kept as raw columns so a login is one hashlib call.
+    # Rows from before the split have NULL salt/iters and a werkzeug string hash.
+    password_salt = db.Column(db.LargeBinary(16), nullable=True)
+    password_hash = db.Column(db.LargeBinary(32), nullable=False)
+    password_iters = db.Column(db.Integer, nullable=True)
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-    permissions = db.relationship('EditorPermission', backref='user', lazy='dynamic', cascade='all, delete-orphan')
-
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+    created_at = db.Column(db.DateTime, server_default=func.current_timestamp())
+
+    # Grant order decides conflicting matches; _query_permission breaks ties by id too
+    permissions = db.relationship('EditorPermission', back_populates='user', order_by='EditorPermission.id',
+                                  cascade='all, delete-orphan')
+
+    @staticmethod
+    def hash_password(password, iterations=PASSWORD_HASH_ITERATIONS):
+        """Values for the password columns, e.g. for bulk inserts"""
+        salt = secrets.token_bytes(16)
+        return {
+            'password_salt': salt,
+            'password_hash': hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations, dklen=32),
+            'password_iters': iterations,
+        }
+
+    def set_password(self, password, iterations=PASSWORD_HASH_ITERATIONS):
+        for key, value in User.hash_password(password, iterations).items():
+            setattr(self, key, value)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if self.password_salt is None:
+            return self._check_legacy_password(password)
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), self.password_salt,
+                                     self.password_iters, dklen=32)
+        return hmac.compare_digest(digest, self.password_hash)
+
+    def _check_legacy_password(self, password):
+        """Verify a werkzeug hash and, on success, rehash into the column format (caller commits)"""
+        legacy_hash = self.password_hash
+        if isinstance(legacy_hash, bytes):
+            legacy_hash = legacy_hash.decode()
+        if not check_password_hash(legacy_hash, password):
+            return False
+        self.set_password(password)
+        return True
+
+    @cached_property
+    def _perm_index(self):
+        """(exact slug -> [(section_id, can_edit)], wildcard (prefix, section_id, can_edit) tuples, has '*')"""
+        exact = {}
+        wildcards = []
+        star = False
+        for perm in self.permissions:
+            if perm.pattern_type == PERM_STAR:
+                star = True
+            elif perm.pattern_type == PERM_PREFIX:
+                wildcards.append((perm.prefix, perm.section_id, perm.can_edit))
+            else:
+                exact.setdefault(perm.page_slug, []).append((perm.section_id, perm.can_edit))
+        return exact, tuple(wildcards), star
 
     def has_permission(self, page_slug, section_id=None):
         """Check if user has edit permission for a page/section"""
-        for perm in self.permissions:
-            if perm.page_slug == '*':
-                return True
-            if perm.page_slug.endswith('/*'):
-                prefix = perm.page_slug[:-2]
-                if page_slug.startswith(prefix):
-                    if section_id is None or perm.section_id is None or perm.section_id == section_id:
-                        return perm.can_edit
-            if perm.page_slug == page_slug:
-                if section_id is None or perm.section_id is None or perm.section_id == section_id:
-                    return perm.can_edit
+        if 'permissions' not in self.__dict__ and '_perm_index' not in self.__dict__:
+            # Grants aren't loaded: let the database answer instead of fetching them all
+            return self._query_permission(page_slug, section_id)
+        exact, wildcards, star = self._perm_index
+        if star:
+            return True
+        for perm_section, can_edit in exact.get(page_slug, ()):
+            if section_id is None or perm_section is None or perm_section == section_id:
+                return can_edit
+        for prefix, perm_section, can_edit in wildcards:
+            if page_slug.startswith(prefix):
+                if section_id is None or perm_section is None or perm_section == section_id:
+                    return can_edit
         return False
 
+    def _query_permission(self, page_slug, section_id=None):
+        """has_permission as a single indexed query, same precedence: '*', exact slug, wildcard"""
+        perm = EditorPermission
+        stmt = (
+            select(perm.pattern_type, perm.can_edit)
+            .where(
+                perm.user_id == self.id,
+                or_(
+                    perm.pattern_type == PERM_STAR,
+                    perm.page_slug == page_slug,
+                    func.instr(literal(page_slug), perm.prefix) == 1
+                )
+            )
+            .order_by(case((perm.pattern_type == PERM_STAR, 0), (perm.page_slug == page_slug, 1), else_=2), perm.id)
+            .limit(1)
+        )
+        if section_id is not None:
+            stmt = stmt.where(or_(perm.pattern_type == PERM_STAR, perm.section_id.is_(None), perm.section_id == section_id))
+        row = db.session.execute(stmt).first()
+        if row is None:
+            return False
+        return True if row.pattern_type == PERM_STAR else row.can_edit
+
 class EditorPermission(db.Model):
     __tablename__ = 'editor_permissions'
 
@@ -47,6 +166,33 @@ class EditorPermission(db.Model):
     page_slug = db.Column(db.String(200), nullable=False)
     section_id = db.Column(db.String(100), nullable=True)
     can_edit = db.Column(db.Boolean, default=True)
+    # page_slug without the trailing '/*' for wildcard grants, NULL otherwise
+    prefix = db.Column(db.String(200), nullable=True, default=_default_prefix)
+    pattern_type = db.Column(db.SmallInteger, nullable=False, default=_default_pattern_type)
+
+    user = db.relationship('User', back_populates='permissions')
+
+    # Permission checks and the selectin load both filter on user_id
+    __table_args__ = (
+        db.Index('ix_editor_permissions_user_slug', 'user_id', 'page_slug'),
+        db.Index('ix_editor_permissions_user_prefix', 'user_id', 'prefix'),
+        db.Index('ix_editor_permissions_star', 'user_id', sqlite_where=db.text(f'pattern_type = {PERM_STAR}')),
+    )
+
+    @validates('page_slug')
+    def _set_pattern(self, key, page_slug):
+        self.pattern_type, self.prefix = _slug_pattern(page_slug)
+        return page_slug
+
+@event.listens_for(EditorPermission, 'after_insert')
+@event.listens_for(EditorPermission, 'after_update')
+@event.listens_for(EditorPermission, 'after_delete')
+def _invalidate_perm_index(mapper, connection, target):
+    """Drop the owning user's cached permission index when a grant changes"""
+    session = object_session(target)
+    user = session.identity_map.get(identity_key(User, target.user_id)) if session else None
+    if user is not None:
+        user.__dict__.pop('_perm_index', None)
 
 class Page(db.Model):
     __tablename__ = 'pages'
@@ -55,17 +201,32 @@ class Page(db.Model):
     slug = db.Column(db.String(200), unique=True, nullable=False)
     title = db.Column(db.String(200), nullable=False)
     parent_slug = db.Column(db.String(200), nullable=True)
-    content_json = db.Column(db.Text, default='{}')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    content_json = db.Column(db.LargeBinary, default=b'{}')
+    # Copy of content_json's 'html' for page views; databases that predate it need a backfill:
+    #   UPDATE pages SET content_html = json_extract(CAST(content_json AS TEXT), '$.html')
+    content_html = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, server_default=func.current_timestamp())
+    updated_at = db.Column(db.DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    content_blocks = db.relationship('ContentBlock', back_populates='page', order_by='ContentBlock.position', cascade='all, delete-orphan')
 
-    content_blocks = db.relationship('ContentBlock', backref='page', lazy='dynamic', cascade='all, delete-orphan')
+    @cached_property
+    def _content(self):
+        return orjson.loads(self.content_json) if self.content_json else {}
+
+    @validates('content_json')
+    def _reset_content(self, key, value):
+        self.__dict__.pop('_content', None)
+        return value
 
     def get_content(self):
-        return json.loads(self.content_json) if self.content_json else {}
+        """Fresh top-level dict; nested values are shared with the parse cache"""
+        return dict(self._content)
 
     def set_content(self, content):
-        self.content_json = json.dumps(content)
+        self.content_json = orjson.dumps(content)
+        # Denormalized copy so page views can skip JSON decoding
+        self.content_html = content.get('html')
 
 class ContentBlock(db.Model):
     __tablename__ = 'content_blocks'
@@ -74,43 +235,70 @@ class ContentBlock(db.Model):
     page_id = db.Column(db.Integer, db.ForeignKey('pages.id'), nullable=False)
     block_type = db.Column(db.String(50), nullable=False)  # button, text, image, faq, radar_chart, button_grid
     position = db.Column(db.Integer, default=0)
-    content_json = db.Column(db.Text, default='{}')
+    content_json = db.Column(db.LargeBinary, default=b'{}')
+    # VIRTUAL JSON1 column so SQL can read the title without a Python parse; deferred so ORM
+    # loads don't evaluate it, and json_valid keeps malformed content_json writable
+    config_title = db.deferred(db.Column(db.String, db.Computed(
+        "CASE WHEN json_valid(CAST(content_json AS TEXT)) "
+        "THEN json_extract(CAST(content_json AS TEXT), '$.title') END",
+        persisted=False)))
     section_id = db.Column(db.String(100), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=func.current_timestamp())
+    updated_at = db.Column(db.DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    page = db.relationship('Page', back_populates='content_blocks')
+    buttons = db.relationship('Button', back_populates='content_block', order_by='Button.position', cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_content_blocks_page_position', 'page_id', 'position'),
+    )
 
-    buttons = db.relationship('Button', backref='content_block', lazy='dynamic', cascade='all, delete-orphan')
+    @cached_property
+    def _content(self):
+        return orjson.loads(self.content_json) if self.content_json else {}
+
+    @validates('content_json')
+    def _reset_content(self, key, value):
+        self.__dict__.pop('_content', None)
+        return value
 
     def get_content(self):
-        return json.loads(self.content_json) if self.content_json else {}
+        """Fresh top-level dict; nested values are shared with the parse cache"""
+        return dict(self._content)
 
     def set_content(self, content):
-        self.content_json = json.dumps(content)
+        self.content_json = orjson.dumps(content)
 
 class Button(db.Model):
     __tablename__ = 'buttons'
 
     id = db.Column(db.Integer, primary_key=True)
     content_block_id = db.Column(db.Integer, db.ForeignKey('content_blocks.id'), nullable=False)
-    icon_url = db.Column(db.String(500), nullable=True)
+    icon_url = db.Column(db.String(500), nullable=False, default='', server_default='')
     label = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text, nullable=True)
+    description = db.Column(db.Text, nullable=False, default='', server_default='')
     link_url = db.Column(db.String(500), nullable=False)
     link_type = db.Column(db.String(20), default='internal')  # internal, external
     position = db.Column(db.Integer, default=0)
 
+    content_block = db.relationship('ContentBlock', back_populates='buttons')
+
+    __table_args__ = (
+        db.Index('ix_buttons_block_position', 'content_block_id', 'position'),
+    )
+
 class Team(db.Model):
     __tablename__ = 'teams'
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     slug = db.Column(db.String(100), unique=True, nullable=False)
-    icon_url = db.Column(db.String(500), nullable=True)
-    description = db.Column(db.Text, nullable=True)
+    icon_url = db.Column(db.String(500), nullable=False, default='', server_default='')
+    description = db.Column(db.Text, nullable=False, default='', server_default='')
     position = db.Column(db.Integer, default=0)
 
-    members = db.relationship('TeamMember', backref='team', lazy='dynamic', cascade='all, delete-orphan')
-    radar_charts = db.relationship('RadarChart', backref='team', lazy='dynamic', cascade='all, delete-orphan')
+    members = db.relationship('TeamMember', back_populates='team', order_by='TeamMember.position', cascade='all, delete-orphan')
+    radar_charts = db.relationship('RadarChart', back_populates='team', cascade='all, delete-orphan')
 
 class TeamMember(db.Model):
     __tablename__ = 'team_members'
@@ -118,22 +306,33 @@ class TeamMember(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
-    role = db.Column(db.String(100), nullable=True)
-    avatar_url = db.Column(db.String(500), nullable=True)
-    description = db.Column(db.Text, nullable=True)
+    role = db.Column(db.String(100), nullable=False, default='', server_default='')
+    avatar_url = db.Column(db.String(500), nullable=False, default='', server_default='')
+    description = db.Column(db.Text, nullable=False, default='', server_default='')
     position = db.Column(db.Integer, default=0)
 
+    team = db.relationship('Team', back_populates='members')
+
+    __table_args__ = (
+        db.Index('ix_team_members_team_position', 'team_id', 'position'),
+    )
+
 class ReplayReview(db.Model):
     __tablename__ = 'replay_reviews'
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content_html = db.Column(db.Text, nullable=False)
-    gamemode = db.Column(db.String(50), nullable=True)
-    map_name = db.Column(db.String(100), nullable=True)
-    author = db.Column(db.String(100), nullable=True)
-    published_at = db.Column(db.DateTime, default=datetime.utcnow)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    gamemode = db.Column(db.String(50), nullable=False, default='', server_default='')
+    map_name = db.Column(db.String(100), nullable=False, default='', server_default='')
+    author = db.Column(db.String(100), nullable=False, default='', server_default='')
+    published_at = db.Column(db.DateTime, server_default=func.current_timestamp())
+    created_at = db.Column(db.DateTime, server_default=func.current_timestamp())
+
+    # Review lists are always newest-first with a LIMIT
+    __table_args__ = (
+        db.Index('ix_replay_reviews_published_at', published_at.desc()),
+    )
 
 class RadarChart(db.Model):
     __tablename__ = 'radar_charts'
@@ -142,103 +341,130 @@ class RadarChart(db.Model):
     team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=True)
     content_block_id = db.Column(db.Integer, db.ForeignKey('content_blocks.id'), nullable=True)
     title = db.Column(db.String(200), nullable=False)
-    axes_json = db.Column(db.Text, default='[]')
-    data_json = db.Column(db.Text, default='[]')
+    axes_json = db.Column(db.LargeBinary, default=b'[]')
+    data_json = db.Column(db.LargeBinary, default=b'[]')
+
+    team = db.relationship('Team', back_populates='radar_charts')
+
+    @cached_property
+    def _axes(self):
+        return orjson.loads(self.axes_json) if self.axes_json else []
+
+    @cached_property
+    def _data(self):
+        return orjson.loads(self.data_json) if self.data_json else []
+
+    @validates('axes_json', 'data_json')
+    def _reset_parsed(self, key, value):
+        self.__dict__.pop('_axes' if key == 'axes_json' else '_data', None)
+        return value
 
     def get_axes(self):
-        return json.loads(self.axes_json) if self.axes_json else []
+        return list(self._axes)
 
     def set_axes(self, axes):
-        self.axes_json = json.dumps(axes)
+        self.axes_json = orjson.dumps(axes)
 
     def get_data(self):
-        return json.loads(self.data_json) if self.data_json else []
+        return list(self._data)
 
     def set_data(self, data):
-        self.data_json = json.dumps(data)
+        self.data_json = orjson.dumps(data)
+
+def _drop_parsed_json(cls, *keys):
+    """Forget parsed JSON when the ORM (re)loads or expires the row; @validates only sees assignments"""
+    def drop(target, *args):
+        for key in keys:
+            target.__dict__.pop(key, None)
+    for event_name in ('load', 'refresh', 'expire'):
+        event.listen(cls, event_name, drop)
+
+_drop_parsed_json(Page, '_content')
+_drop_parsed_json(ContentBlock, '_content')
+_drop_parsed_json(RadarChart, '_axes', '_data')
+
+# Bump whenever a model change can't be applied to an existing database by create_all
+SCHEMA_VERSION = 1
+
+# SQL over the old row for columns that an older table lacks (or left NULL)
+_UPGRADE_FILLS = {
+    ('editor_permissions', 'pattern_type'):
+        f"CASE WHEN page_slug = '*' THEN {PERM_STAR} WHEN page_slug LIKE '%/*' THEN {PERM_PREFIX} ELSE {PERM_EXACT} END",
+    ('editor_permissions', 'prefix'):
+        "CASE WHEN page_slug != '*' AND page_slug LIKE '%/*' THEN substr(page_slug, 1, length(page_slug) - 2) END",
+    ('pages', 'content_html'):
+        "CASE WHEN json_valid(CAST(content_json AS TEXT)) THEN json_extract(CAST(content_json AS TEXT), '$.html') END",
+}
+
+def _copy_expression(table, column, old_columns):
+    """SQL that carries column over from the old table, or None to leave it to the new default"""
+    fill = _UPGRADE_FILLS.get((table.name, column.name))
+    if column.name not in old_columns:
+        return fill
+    expression = column.name
+    if isinstance(column.type, db.LargeBinary):
+        expression = f'CAST({expression} AS BLOB)'
+    if fill is not None:
+        expression = f'COALESCE({expression}, {fill})'
+    elif not column.nullable and column.server_default is not None:
+        expression = f"COALESCE({expression}, '{column.server_default.arg}')"
+    return expression
+
+def _rebuild_table(cursor, table, old_columns):
+    """Recreate table from the model and copy its rows across (SQLite can't ALTER constraints)"""
+    dialect = db.engine.dialect
+    new_name = f'{table.name}__upgrade'
+    create = str(CreateTable(table).compile(dialect=dialect)).strip()
+    cursor.execute(create.replace(f'CREATE TABLE {table.name} (', f'CREATE TABLE {new_name} (', 1))
+    copies = {}
+    for column in table.columns:
+        if column.computed is None:
+            expression = _copy_expression(table, column, old_columns)
+            if expression is not None:
+                copies[column.name] = expression
+    cursor.execute(f'INSERT INTO {new_name} ({", ".join(copies)}) '
+                   f'SELECT {", ".join(copies.values())} FROM {table.name}')
+    cursor.execute(f'DROP TABLE {table.name}')
+    cursor.execute(f'ALTER TABLE {new_name} RENAME TO {table.name}')
+    for index in table.indexes:
+        cursor.execute(str(CreateIndex(index).compile(dialect=dialect)))
 
 def init_db(app):
-    """Initialize database with tables and seed data"""
+    """Create the tables of a fresh database; demo content is seeded by app.seed_comprehensive_data"""
     with app.app_context():
         db.create_all()
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(f'PRAGMA user_version = {SCHEMA_VERSION}')
 
-        # Check if we need to seed
-        if User.query.count() == 0:
-            seed_demo_data()
-
-def seed_demo_data():
-    """Seed demo users and initial content"""
-    # Demo users
-    admin = User(username='admin', email='admin@faf.wiki')
-    admin.set_password('admin123')
-    db.session.add(admin)
-
-    editor_teams = User(username='editor_teams', email='teams@faf.wiki')
-    editor_teams.set_password('editor123')
-    db.session.add(editor_teams)
-
-    editor_rules = User(username='editor_rules', email='rules@faf.wiki')
-    editor_rules.set_password('editor123')
-    db.session.add(editor_rules)
-
-    db.session.flush()
-
-    # Permissions
-    db.session.add(EditorPermission(user_id=admin.id, page_slug='*', can_edit=True))
-    db.session.add(EditorPermission(user_id=editor_teams.id, page_slug='teams/*', can_edit=True))
-    db.session.add(EditorPermission(user_id=editor_rules.id, page_slug='rules/*', can_edit=True))
-
-    # Teams
-    teams_data = [
-        ('Trainer Team', 'trainer', 'Training and coaching players'),
-        ('Promotions Team', 'promotions', 'Promoting FAF content and events'),
-        ('FAF Live Team', 'faf-live', 'Live streaming and casting'),
-        ('Tournament Team', 'tournament', 'Organizing tournaments'),
-        ('Matchmaking Team', 'matchmaking', 'Improving matchmaking experience'),
-        ('Balance Team', 'balance', 'Game balance and patches'),
-        ('Games Team', 'games', 'Game development'),
-        ('Creative Team', 'creative', 'Art, design and creative content'),
-        ('Moderation Team', 'moderation', 'Community moderation'),
-        ('DevOps Team', 'devops', 'Infrastructure and operations'),
-        ('Campaign Team', 'campaign', 'Single player campaigns'),
-    ]
-
-    for i, (name, slug, desc) in enumerate(teams_data):
-        team = Team(name=name, slug=slug, description=desc, position=i)
-        db.session.add(team)
-
-    # Home page
-    home_page = Page(slug='home', title='FAForever Wiki')
-    db.session.add(home_page)
-    db.session.flush()
-
-    # Main navigation buttons
-    main_buttons = ContentBlock(
-        page_id=home_page.id,
-        block_type='button_grid',
-        position=0,
-        section_id='main-nav'
-    )
-    db.session.add(main_buttons)
-    db.session.flush()
-
-    nav_items = [
-        ('Getting Started', 'Start your FAF journey', '/getting-started', 'rocket'),
-        ('Playing', 'Learn to play', '/playing', 'gamepad'),
-        ('Rules', 'Community guidelines', '/rules', 'book'),
-        ('FAF Teams', 'Meet the teams', '/teams', 'users'),
-    ]
-
-    for i, (label, desc, url, icon) in enumerate(nav_items):
-        btn = Button(
-            content_block_id=main_buttons.id,
-            label=label,
-            description=desc,
-            link_url=url,
-            link_type='internal',
-            icon_url=f'/static/assets/icons/{icon}.svg',
-            position=i
-        )
-        db.session.add(btn)
-
-    db.session.commit()
+def upgrade_db(app):
+    """Bring a database from an older release up to SCHEMA_VERSION; a single PRAGMA read once it is"""
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            if cursor.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+                return
+            # Manual transaction control; foreign keys must be off while tables are swapped
+            isolation_level = connection.driver_connection.isolation_level
+            connection.driver_connection.isolation_level = None
+            cursor.execute('PRAGMA foreign_keys=OFF')
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                for table in db.metadata.sorted_tables:
+                    old_columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table.name})')}
+                    if old_columns:
+                        _rebuild_table(cursor, table, old_columns)
+                    else:
+                        cursor.execute(str(CreateTable(table).compile(dialect=db.engine.dialect)))
+                        for index in table.indexes:
+                            cursor.execute(str(CreateIndex(index).compile(dialect=db.engine.dialect)))
+                cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            finally:
+                cursor.execute('PRAGMA foreign_keys=ON')
+                connection.driver_connection.isolation_level = isolation_level
+        finally:
+            connection.close()